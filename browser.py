@@ -2,19 +2,480 @@ import sys
 import os
 import json
 import logging
+import uuid
 from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QPushButton, QToolBar, QAction, QTabWidget, QLabel, QCheckBox, QListWidget, QListWidgetItem, QInputDialog, QComboBox, QFormLayout, QMessageBox, QFileDialog, QMenu
+from html.parser import HTMLParser
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QPushButton, QToolBar, QAction, QTabWidget, QLabel, QCheckBox, QListWidget, QListWidgetItem, QInputDialog, QComboBox, QFormLayout, QMessageBox, QFileDialog, QMenu, QTreeWidget, QTreeWidgetItem
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineDownloadItem
-from PyQt5.QtCore import QUrl, Qt, QTranslator, QLocale
+from PyQt5.QtCore import QUrl, Qt, QTranslator, QLocale, QObject, QTimer, pyqtSignal
 from PyQt5.QtGui import QClipboard
 
+ROOT_FOLDER = 'root'
+
+SETTINGS_VERSION = 1
+THEMES = ["Светлая", "Темная"]
+LANGUAGES = ["ru", "en"]
+
+
+def profile_path():
+    if sys.platform.startswith('win'):
+        base = os.getenv('APPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support')
+    else:
+        base = os.getenv('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'dxddy', 'ent')
+
+
+def migrate_settings_v0(config):
+    # Конфиги бета-версии не содержали номера схемы, набор ключей тот же
+    return config
+
+
+SETTINGS_MIGRATIONS = {
+    0: migrate_settings_v0,
+}
+
+
+class Settings(QObject):
+    # Настройки кэшируются в памяти; изменения рассылаются сигналом changed
+    # по одному ключу, а запись на диск откладывается и выполняется атомарно.
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, config_file, logger, save_delay=500):
+        super().__init__()
+        self.config_file = config_file
+        self.logger = logger
+        self.values = self.defaults()
+        # Файл из более новой версии браузера сохраняется со своим номером схемы
+        # и ключами, которых эта версия не понимает, чтобы откат не терял данные
+        self.version = SETTINGS_VERSION
+        self.extra = {}
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(save_delay)
+        self.save_timer.timeout.connect(self.save)
+
+    @staticmethod
+    def defaults():
+        return {
+            'default_search_engine': 'http://www.google.com',
+            'theme': THEMES[0],
+            'download_path': os.path.expanduser('~'),
+            'language': LANGUAGES[0]
+        }
+
+    def validate(self, key, value):
+        if key not in self.values:
+            raise ValueError(f'Неизвестная настройка: {key}')
+        if key == 'default_search_engine':
+            if not isinstance(value, str) or not value.startswith(('http://', 'https://')):
+                raise ValueError('Поисковая страница должна начинаться с http:// или https://')
+            # navigate_to_url сам добавляет "/search?q="
+            return value.rstrip('/')
+        if key == 'theme' and value not in THEMES:
+            raise ValueError(f'Неизвестная тема: {value}')
+        if key == 'language' and value not in LANGUAGES:
+            raise ValueError(f'Неизвестный язык: {value}')
+        if key == 'download_path' and (not isinstance(value, str) or not value.strip()):
+            raise ValueError('Путь загрузки не может быть пустым')
+        return value
+
+    def load(self):
+        if not os.path.exists(self.config_file):
+            return
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as file:
+                config = json.load(file)
+            if not isinstance(config, dict):
+                raise ValueError('config root is not an object')
+            version = config.pop('version', 0)
+            if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+                raise ValueError(f'invalid schema version: {version!r}')
+            loaded_version = version
+            while version < SETTINGS_VERSION:
+                if version not in SETTINGS_MIGRATIONS:
+                    raise ValueError(f'no migration from schema version {version}')
+                config = SETTINGS_MIGRATIONS[version](config)
+                version += 1
+        except ValueError as e:
+            # Повреждённый файл откладывается в сторону, используются значения по умолчанию
+            self.logger.error(f'Corrupt config: {e}')
+            try:
+                os.replace(self.config_file, self.config_file + '.corrupt')
+            except OSError as e:
+                self.logger.error(f'Error moving corrupt config aside: {e}')
+            return
+        except OSError as e:
+            self.logger.error(f'Error reading config: {e}')
+            return
+        newer = loaded_version > SETTINGS_VERSION
+        if newer:
+            self.version = loaded_version
+            self.logger.warning(f'Config is from newer schema version {loaded_version}, unknown keys are kept')
+        for key, value in config.items():
+            if key not in self.values:
+                if newer:
+                    self.extra[key] = value
+                continue
+            try:
+                self.values[key] = self.validate(key, value)
+            except ValueError as e:
+                self.logger.warning(f'Invalid setting {key}, default used: {e}')
+                if newer:
+                    self.extra[key] = value
+        if loaded_version < SETTINGS_VERSION:
+            self.save_timer.start()
+            logging.info(f'Config migrated from version {loaded_version} to {SETTINGS_VERSION}')
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def update(self, values):
+        # Все значения проверяются до применения, чтобы не сохранить настройки частично
+        validated = {key: self.validate(key, value) for key, value in values.items()}
+        changed = [key for key, value in validated.items() if self.values[key] != value]
+        for key in changed:
+            self.values[key] = validated[key]
+            self.extra.pop(key, None)
+        for key in changed:
+            self.changed.emit(key, self.values[key])
+        if changed:
+            self.save_timer.start()
+        return changed
+
+    def set(self, key, value):
+        return self.update({key: value})
+
+    def save(self):
+        try:
+            self.flush()
+        except OSError as e:
+            self.logger.error(f'Error saving settings: {e}')
+
+    def flush(self):
+        self.save_timer.stop()
+        tmp_file = self.config_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as file:
+            json.dump(dict(self.values, **self.extra, version=self.version), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self.config_file)
+        logging.info('Settings saved')
+
+
+class BookmarkStore:
+    # Закладки хранятся в снимке bookmarks.json и журнале bookmarks.journal.
+    # Каждое изменение дописывается в журнал одной строкой, снимок
+    # перезаписывается только при сжатии журнала.
+    def __init__(self, path, logger, compact_threshold=200):
+        self.snapshot_file = os.path.join(path, 'bookmarks.json')
+        self.journal_file = os.path.join(path, 'bookmarks.journal')
+        self.logger = logger
+        self.compact_threshold = compact_threshold
+        self.folders = {ROOT_FOLDER: {'id': ROOT_FOLDER, 'title': 'Закладки', 'parent': None}}
+        self.by_url = {}
+        self.journal_size = 0
+        # Пока данные с диска не прочитаны, снимок не перезаписывается:
+        # изменения копятся в журнале и применятся при следующей загрузке
+        self.loaded = False
+
+    @staticmethod
+    def valid_folder(folder):
+        return (isinstance(folder, dict) and isinstance(folder.get('id'), str)
+                and isinstance(folder.get('title'), str)
+                and (folder.get('parent') is None or isinstance(folder.get('parent'), str)))
+
+    @staticmethod
+    def valid_bookmark(bookmark):
+        return (isinstance(bookmark, dict) and isinstance(bookmark.get('url'), str)
+                and isinstance(bookmark.get('title'), str) and isinstance(bookmark.get('folder'), str)
+                and isinstance(bookmark.get('tags'), list) and all(isinstance(t, str) for t in bookmark['tags'])
+                and isinstance(bookmark.get('added'), str))
+
+    @classmethod
+    def valid_entry(cls, entry):
+        if not isinstance(entry, dict):
+            return False
+        op = entry.get('op')
+        if op == 'add':
+            return cls.valid_bookmark(entry.get('bookmark'))
+        if op == 'remove':
+            return isinstance(entry.get('url'), str)
+        if op == 'add_folder':
+            return cls.valid_folder(entry.get('folder')) and entry['folder']['id'] != ROOT_FOLDER
+        if op == 'remove_folder':
+            return isinstance(entry.get('id'), str)
+        return False
+
+    def load(self):
+        corrupt = self.read()
+        self.loaded = True
+        if corrupt:
+            self.compact()
+
+    def read(self):
+        # Читает снимок и журнал заново. Память хранилища лишь кэш: все изменения
+        # уже записаны в журнал, в том числе другими окнами с тем же профилем.
+        self.folders = {ROOT_FOLDER: {'id': ROOT_FOLDER, 'title': 'Закладки', 'parent': None}}
+        self.by_url = {}
+        self.journal_size = 0
+        corrupt = False
+        if os.path.exists(self.snapshot_file):
+            try:
+                with open(self.snapshot_file, 'r', encoding='utf-8') as file:
+                    snapshot = json.load(file)
+                if not isinstance(snapshot, dict):
+                    raise ValueError('snapshot root is not an object')
+                folders = snapshot.get('folders', {})
+                bookmarks = snapshot.get('bookmarks', [])
+                if not isinstance(folders, dict) or not all(self.valid_folder(f) for f in folders.values()):
+                    raise ValueError('invalid folders')
+                if not isinstance(bookmarks, list) or not all(self.valid_bookmark(b) for b in bookmarks):
+                    raise ValueError('invalid bookmarks')
+                folders.pop(ROOT_FOLDER, None)
+                self.folders.update(folders)
+                self.by_url = {bookmark['url']: bookmark for bookmark in bookmarks}
+            except ValueError as e:
+                # Повреждённый снимок откладывается в сторону, чтобы следующее
+                # сжатие не затёрло его
+                self.logger.error(f'Corrupt bookmarks snapshot: {e}')
+                try:
+                    os.replace(self.snapshot_file, self.snapshot_file + '.corrupt')
+                except OSError as e:
+                    # Без переноса следующее сжатие затёрло бы снимок
+                    raise OSError(f'Error moving corrupt bookmarks snapshot aside: {e}') from e
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        # Недописанная строка после аварийного завершения,
+                        # в том числе оборванная посреди многобайтового символа
+                        entry = None
+                    if not self.valid_entry(entry):
+                        self.logger.error('Skipped corrupt bookmark journal entry')
+                        corrupt = True
+                        continue
+                    self.apply(entry)
+                    self.journal_size += 1
+        self.repair()
+        return corrupt
+
+    def repair(self):
+        # Папки и закладки, ссылающиеся на несуществующую папку, переносятся в корень,
+        # как и папки, цепочка родителей которых зацикливается
+        for folder in self.folders.values():
+            if folder['id'] != ROOT_FOLDER and folder['parent'] not in self.folders:
+                folder['parent'] = ROOT_FOLDER
+        for folder in self.folders.values():
+            seen = {folder['id']}
+            parent = folder['parent']
+            while parent is not None and parent != ROOT_FOLDER:
+                if parent in seen:
+                    folder['parent'] = ROOT_FOLDER
+                    break
+                seen.add(parent)
+                parent = self.folders[parent]['parent']
+        for bookmark in self.by_url.values():
+            if bookmark['folder'] not in self.folders:
+                bookmark['folder'] = ROOT_FOLDER
+
+    def apply(self, entry):
+        op = entry['op']
+        if op == 'add':
+            bookmark = entry['bookmark']
+            self.by_url[bookmark['url']] = bookmark
+        elif op == 'remove':
+            self.by_url.pop(entry['url'], None)
+        elif op == 'add_folder':
+            folder = entry['folder']
+            self.folders[folder['id']] = folder
+        elif op == 'remove_folder':
+            self.drop_folder(entry['id'])
+
+    def drop_folder(self, folder_id):
+        if folder_id == ROOT_FOLDER:
+            return
+        for child_id in [f['id'] for f in self.folders.values() if f['parent'] == folder_id]:
+            self.drop_folder(child_id)
+        self.folders.pop(folder_id, None)
+        self.by_url = {url: b for url, b in self.by_url.items() if b['folder'] != folder_id}
+
+    def record(self, entry):
+        self.apply(entry)
+        with open(self.journal_file, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.journal_size += 1
+        if self.journal_size >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        if not self.loaded:
+            return
+        # Перед записью снимка подхватываются изменения других окон,
+        # иначе удаление общего журнала потеряло бы их
+        self.read()
+        self.write_snapshot()
+
+    def write_snapshot(self):
+        # Повторное применение журнала к новому снимку идемпотентно, поэтому
+        # сбой между заменой снимка и очисткой журнала ничего не теряет.
+        tmp_file = self.snapshot_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as file:
+            json.dump({'folders': self.folders, 'bookmarks': list(self.by_url.values())}, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self.journal_size = 0
+
+    def is_bookmarked(self, url):
+        return url in self.by_url
+
+    def get(self, url):
+        return self.by_url.get(url)
+
+    def add(self, url, title, folder=ROOT_FOLDER, tags=None, added=None):
+        bookmark = {
+            'url': url,
+            'title': title or url,
+            'folder': folder if folder in self.folders else ROOT_FOLDER,
+            'tags': list(tags or []),
+            'added': added or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.record({'op': 'add', 'bookmark': bookmark})
+        return bookmark
+
+    def remove(self, url):
+        if url in self.by_url:
+            self.record({'op': 'remove', 'url': url})
+
+    def update(self, url, **fields):
+        bookmark = dict(self.by_url[url], **fields)
+        self.record({'op': 'add', 'bookmark': bookmark})
+        return bookmark
+
+    def find_folder(self, title, parent):
+        for folder in self.folders.values():
+            if folder['title'] == title and folder['parent'] == parent:
+                return folder['id']
+        return None
+
+    def add_folder(self, title, parent=ROOT_FOLDER):
+        folder_id = self.find_folder(title, parent)
+        if folder_id is not None:
+            return folder_id
+        folder = {'id': uuid.uuid4().hex, 'title': title, 'parent': parent}
+        self.record({'op': 'add_folder', 'folder': folder})
+        return folder['id']
+
+    def remove_folder(self, folder_id):
+        if folder_id in self.folders and folder_id != ROOT_FOLDER:
+            self.record({'op': 'remove_folder', 'id': folder_id})
+
+    def subfolders(self, folder_id):
+        return [f for f in self.folders.values() if f['parent'] == folder_id]
+
+    def bookmarks_in(self, folder_id):
+        return [b for b in self.by_url.values() if b['folder'] == folder_id]
+
+    def folder_path(self, folder_id):
+        titles = []
+        while folder_id is not None:
+            folder = self.folders[folder_id]
+            titles.append(folder['title'])
+            folder_id = folder['parent']
+        return ' / '.join(reversed(titles))
+
+    def import_netscape(self, path):
+        if not self.loaded:
+            # Импорт сохраняется только снимком, который незагруженное хранилище не пишет
+            raise RuntimeError('bookmarks are not loaded, import refused')
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            parser = NetscapeBookmarkParser()
+            parser.feed(file.read())
+            parser.close()
+        self.read()
+        # Импорт применяется в памяти и сохраняется одним снимком,
+        # а не тысячами строк журнала. Папки с тем же названием у того же
+        # родителя переиспользуются, поэтому повторный импорт не плодит копии.
+        folder_ids = {}
+        imported = set()
+        for entry in parser.entries:
+            if entry['op'] == 'add_folder':
+                folder = entry['folder']
+                parent = folder_ids.get(folder['parent'], folder['parent'])
+                existing = self.find_folder(folder['title'], parent)
+                if existing is None:
+                    self.apply({'op': 'add_folder', 'folder': dict(folder, parent=parent)})
+                    existing = folder['id']
+                folder_ids[folder['id']] = existing
+            else:
+                bookmark = entry['bookmark']
+                folder = folder_ids.get(bookmark['folder'], bookmark['folder'])
+                self.apply({'op': 'add', 'bookmark': dict(bookmark, folder=folder)})
+                imported.add(bookmark['url'])
+        self.write_snapshot()
+        return len(imported)
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+        self.folder_stack = [ROOT_FOLDER]
+        self.pending_folder = None
+        self.folder = None
+        self.bookmark = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'h3':
+            self.pending_folder = None
+            self.folder = {'id': uuid.uuid4().hex, 'title': '', 'parent': self.folder_stack[-1]}
+        elif tag == 'dl':
+            self.folder_stack.append(self.pending_folder or self.folder_stack[-1])
+            self.pending_folder = None
+        elif tag == 'a' and attrs.get('href'):
+            self.pending_folder = None
+            added = attrs.get('add_date')
+            try:
+                added = datetime.fromtimestamp(int(added)).strftime("%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError, OverflowError, OSError):
+                added = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            tags = [t.strip() for t in (attrs.get('tags') or '').split(',') if t.strip()]
+            self.bookmark = {'url': attrs['href'], 'title': '', 'folder': self.folder_stack[-1], 'tags': tags, 'added': added}
+
+    def handle_data(self, data):
+        if self.folder is not None:
+            self.folder['title'] += data
+        elif self.bookmark is not None:
+            self.bookmark['title'] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'h3' and self.folder is not None:
+            self.folder['title'] = self.folder['title'].strip()
+            self.entries.append({'op': 'add_folder', 'folder': self.folder})
+            self.pending_folder = self.folder['id']
+            self.folder = None
+        elif tag == 'dl' and len(self.folder_stack) > 1:
+            self.folder_stack.pop()
+        elif tag == 'a' and self.bookmark is not None:
+            self.bookmark['title'] = self.bookmark['title'].strip() or self.bookmark['url']
+            self.entries.append({'op': 'add', 'bookmark': self.bookmark})
+            self.bookmark = None
+
+
 class Browser(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle('Fast Browser')
         self.setGeometry(100, 100, 1200, 800)
 
-        self.config_path = os.path.join(os.getenv('APPDATA'), 'dxddy', 'ent')
+        self.config_path = profile_path()
         os.makedirs(self.config_path, exist_ok=True)
         self.config_file = os.path.join(self.config_path, 'config.json')
         self.log_file = os.path.join(self.config_path, 'browser.log')
@@ -31,6 +492,7 @@ class Browser(QMainWindow):
 
         self.translator = QTranslator()
         self.load_settings()
+        self.load_bookmarks()
 
         self.tabs = QTabWidget()
         self.tabs.setDocumentMode(True)
@@ -62,6 +524,9 @@ class Browser(QMainWindow):
         self.settings_button = QAction('⚙', self)
         self.settings_button.triggered.connect(self.show_settings)
 
+        self.bookmark_button = QAction('☆', self)
+        self.bookmark_button.triggered.connect(self.toggle_bookmark)
+
         self.toolbar = QToolBar()
         self.toolbar.addAction(self.settings_button)
         self.toolbar.addAction(self.back_button)
@@ -70,6 +535,7 @@ class Browser(QMainWindow):
         self.toolbar.addAction(self.new_tab_button)
         self.toolbar.addAction(self.translate_button)
         self.toolbar.addWidget(self.url_bar)
+        self.toolbar.addAction(self.bookmark_button)
 
         self.addToolBar(self.toolbar)
 
@@ -82,53 +548,53 @@ class Browser(QMainWindow):
         self.setCentralWidget(container)
 
         self.apply_theme()
+        self.apply_language()
+        self.update_bookmark_button()
 
     def load_settings(self):
+        self.settings = Settings(self.config_file, self.error_logger)
+        self.settings.changed.connect(self.on_setting_changed)
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as file:
-                    config = json.load(file)
-                    self.default_search_engine = config.get('default_search_engine', 'http://www.google.com')
-                    self.theme = config.get('theme', 'Светлая')
-                    self.download_path = config.get('download_path', os.path.expanduser('~'))
-                    self.language = config.get('language', 'ru')
-            else:
-                self.default_search_engine = 'http://www.google.com'
-                self.theme = 'Светлая'
-                self.download_path = os.path.expanduser('~')
-                self.language = 'ru'
-            self.apply_language()
+            self.settings.load()
             logging.info('Settings loaded')
         except Exception as e:
             self.error_logger.error(f'Error loading settings: {e}')
+            self.settings.values = Settings.defaults()
 
     def save_settings(self):
         try:
-            self.default_search_engine = self.search_engine_input.text()
-            self.theme = self.theme_selector.currentText()
-            self.download_path = self.download_path_input.text()
-            self.language = self.language_selector.currentText()
-            self.apply_theme()
-            self.apply_language()
-            config = {
-                'default_search_engine': self.default_search_engine,
-                'theme': self.theme,
-                'download_path': self.download_path,
-                'language': self.language
-            }
-            with open(self.config_file, 'w') as file:
-                json.dump(config, file)
-            logging.info('Settings saved')
-            print(f"Поисковая система сохранена: {self.default_search_engine}")
-            print(f"Тема сохранена: {self.theme}")
-            print(f"Путь загрузки сохранен: {self.download_path}")
-            print(f"Язык сохранен: {self.language}")
+            changed = self.settings.update({
+                'default_search_engine': self.search_engine_input.text(),
+                'theme': self.theme_selector.currentText(),
+                'download_path': self.download_path_input.text(),
+                'language': self.language_selector.currentText()
+            })
+            logging.info(f'Settings changed: {", ".join(changed) or "no changes"}')
+        except ValueError as e:
+            QMessageBox.warning(self, 'Настройки', str(e))
         except Exception as e:
             self.error_logger.error(f'Error saving settings: {e}')
 
+    def on_setting_changed(self, key, value):
+        try:
+            if key == 'theme':
+                self.apply_theme()
+            elif key == 'language':
+                self.apply_language()
+            logging.info(f'Setting changed: {key} = {value}')
+        except Exception as e:
+            self.error_logger.error(f'Error applying setting {key}: {e}')
+
+    def flush_settings(self):
+        try:
+            if self.settings.save_timer.isActive():
+                self.settings.flush()
+        except Exception as e:
+            self.error_logger.error(f'Error flushing settings: {e}')
+
     def apply_theme(self):
         try:
-            if self.theme == "Светлая":
+            if self.settings['theme'] == "Светлая":
                 self.setStyleSheet("""
                     QMainWindow {
                         background-color: #ffffff;
@@ -287,7 +753,7 @@ class Browser(QMainWindow):
 
     def apply_language(self):
         try:
-            if self.language == "ru":
+            if self.settings['language'] == "ru":
                 self.translator.load("ru.qm")
             else:
                 self.translator.load("en.qm")
@@ -308,7 +774,7 @@ class Browser(QMainWindow):
     def add_new_tab(self, qurl=None, label="Новая вкладка"):
         try:
             if qurl is None:
-                qurl = QUrl(self.default_search_engine)
+                qurl = QUrl(self.settings['default_search_engine'])
             browser = QWebEngineView()
             browser.setUrl(qurl)
             browser.page().profile().downloadRequested.connect(self.on_download_requested)
@@ -317,6 +783,7 @@ class Browser(QMainWindow):
             i = self.tabs.addTab(browser, label)
             self.tabs.setCurrentIndex(i)
             browser.urlChanged.connect(lambda qurl, browser=browser: self.update_tab_title(browser))
+            browser.urlChanged.connect(lambda qurl, browser=browser: self.update_bookmark_button(browser))
             browser.loadFinished.connect(lambda _, browser=browser: self.update_tab_title(browser))
             browser.iconChanged.connect(lambda _, browser=browser: self.update_tab_icon(browser))
             logging.info(f'New tab added: {qurl.toString()}')
@@ -361,7 +828,7 @@ class Browser(QMainWindow):
         try:
             browser = self.tabs.currentWidget()
             if isinstance(browser, QWebEngineView):
-                download_path, _ = QFileDialog.getSaveFileName(self, self.tr("Сохранить страницу"), os.path.join(self.download_path, "page.html"))
+                download_path, _ = QFileDialog.getSaveFileName(self, self.tr("Сохранить страницу"), os.path.join(self.settings['download_path'], "page.html"))
                 if download_path:
                     browser.page().save(download_path, QWebEngineDownloadItem.CompleteHtmlSaveFormat)
                     logging.info(f'Page saved: {download_path}')
@@ -402,7 +869,7 @@ class Browser(QMainWindow):
                 context_menu_data = page.contextMenuData()
                 link_url = context_menu_data.linkUrl()
                 if link_url.isValid():
-                    download_path, _ = QFileDialog.getSaveFileName(self, self.tr("Сохранить ссылку"), os.path.join(self.download_path, link_url.fileName()))
+                    download_path, _ = QFileDialog.getSaveFileName(self, self.tr("Сохранить ссылку"), os.path.join(self.settings['download_path'], link_url.fileName()))
                     if download_path:
                         self.download_file(link_url.toString(), download_path)
         except Exception as e:
@@ -437,7 +904,7 @@ class Browser(QMainWindow):
     def on_download_requested(self, download, path=None):
         try:
             if path is None:
-                path, _ = QFileDialog.getSaveFileName(self, self.tr("Сохранить файл"), os.path.join(self.download_path, download.suggestedFileName()))
+                path, _ = QFileDialog.getSaveFileName(self, self.tr("Сохранить файл"), os.path.join(self.settings['download_path'], download.suggestedFileName()))
             if path:
                 download.setPath(path)
                 download.accept()
@@ -463,6 +930,7 @@ class Browser(QMainWindow):
                     self.url_bar.setCursorPosition(0)
                 else:
                     self.url_bar.setText("")
+                self.update_bookmark_button()
         except Exception as e:
             self.error_logger.error(f'Error updating URL bar: {e}')
 
@@ -470,7 +938,7 @@ class Browser(QMainWindow):
         try:
             url = self.url_bar.text()
             if not url.startswith("http"):
-                url = self.default_search_engine + "/search?q=" + url
+                url = self.settings['default_search_engine'] + "/search?q=" + url
             self.tabs.currentWidget().setUrl(QUrl(url))
             logging.info(f'Navigated to URL: {url}')
             self.add_to_history(url)
@@ -512,23 +980,23 @@ class Browser(QMainWindow):
 
             search_engine_label = QLabel("Поисковая страница:")
             self.search_engine_input = QLineEdit()
-            self.search_engine_input.setText(self.default_search_engine)
+            self.search_engine_input.setText(self.settings['default_search_engine'])
 
             theme_label = QLabel("Тема:")
             self.theme_selector = QComboBox()
-            self.theme_selector.addItems(["Светлая", "Темная"])
-            self.theme_selector.setCurrentText(self.theme)
+            self.theme_selector.addItems(THEMES)
+            self.theme_selector.setCurrentText(self.settings['theme'])
 
             download_path_label = QLabel("Путь загрузки:")
             self.download_path_input = QLineEdit()
-            self.download_path_input.setText(self.download_path)
+            self.download_path_input.setText(self.settings['download_path'])
             download_path_button = QPushButton("Выбрать")
             download_path_button.clicked.connect(self.select_download_path)
 
             language_label = QLabel("Язык:")
             self.language_selector = QComboBox()
-            self.language_selector.addItems(["ru", "en"])
-            self.language_selector.setCurrentText(self.language)
+            self.language_selector.addItems(LANGUAGES)
+            self.language_selector.setCurrentText(self.settings['language'])
 
             version_label = QLabel("Бета 0.1v")
             version_label.setAlignment(Qt.AlignCenter)
@@ -545,6 +1013,9 @@ class Browser(QMainWindow):
             history_button = QPushButton("История")
             history_button.clicked.connect(self.show_history)
 
+            bookmarks_button = QPushButton("Закладки")
+            bookmarks_button.clicked.connect(self.show_bookmarks)
+
             form_layout = QFormLayout()
             form_layout.addRow(search_engine_label, self.search_engine_input)
             form_layout.addRow(theme_label, self.theme_selector)
@@ -558,6 +1029,7 @@ class Browser(QMainWindow):
             layout.addWidget(save_button, alignment=Qt.AlignCenter)
             layout.addWidget(update_button, alignment=Qt.AlignCenter)
             layout.addWidget(history_button, alignment=Qt.AlignCenter)
+            layout.addWidget(bookmarks_button, alignment=Qt.AlignCenter)
 
             settings_widget.setLayout(layout)
             i = self.tabs.addTab(settings_widget, "Настройки")
@@ -567,7 +1039,7 @@ class Browser(QMainWindow):
 
     def select_download_path(self):
         try:
-            path = QFileDialog.getExistingDirectory(self, "Выбрать папку для загрузок", self.download_path)
+            path = QFileDialog.getExistingDirectory(self, "Выбрать папку для загрузок", self.settings['download_path'])
             if path:
                 self.download_path_input.setText(path)
         except Exception as e:
@@ -653,7 +1125,205 @@ class Browser(QMainWindow):
         except Exception as e:
             self.error_logger.error(f'Error removing from history: {e}')
 
+    def load_bookmarks(self):
+        self.bookmarks = BookmarkStore(self.config_path, self.error_logger)
+        try:
+            self.bookmarks.load()
+            logging.info('Bookmarks loaded')
+        except Exception as e:
+            self.error_logger.error(f'Error loading bookmarks: {e}')
+            self.bookmarks = BookmarkStore(self.config_path, self.error_logger)
+
+    def update_bookmark_button(self, browser=None):
+        try:
+            if hasattr(self, 'bookmark_button'):
+                current_widget = self.tabs.currentWidget()
+                if browser is not None and browser is not current_widget:
+                    return
+                if isinstance(current_widget, QWebEngineView) and self.bookmarks.is_bookmarked(current_widget.url().toString()):
+                    self.bookmark_button.setText('★')
+                else:
+                    self.bookmark_button.setText('☆')
+        except Exception as e:
+            self.error_logger.error(f'Error updating bookmark button: {e}')
+
+    def toggle_bookmark(self):
+        try:
+            current_widget = self.tabs.currentWidget()
+            if isinstance(current_widget, QWebEngineView):
+                url = current_widget.url().toString()
+                if self.bookmarks.is_bookmarked(url):
+                    self.bookmarks.remove(url)
+                    logging.info(f'Bookmark removed: {url}')
+                else:
+                    self.bookmarks.add(url, current_widget.page().title())
+                    logging.info(f'Bookmark added: {url}')
+                self.update_bookmark_button()
+        except Exception as e:
+            self.error_logger.error(f'Error toggling bookmark: {e}')
+
+    def show_bookmarks(self):
+        try:
+            bookmarks_widget = QWidget()
+            bookmarks_widget.setObjectName("bookmarks_widget")
+            layout = QVBoxLayout()
+
+            bookmarks_tree = QTreeWidget()
+            bookmarks_tree.setHeaderLabels(["Название", "Адрес", "Теги"])
+            bookmarks_tree.itemDoubleClicked.connect(self.open_bookmark_item)
+            self.populate_bookmarks(bookmarks_tree)
+
+            import_button = QPushButton("Импорт")
+            import_button.clicked.connect(lambda: self.import_bookmarks(bookmarks_tree))
+
+            new_folder_button = QPushButton("Новая папка")
+            new_folder_button.clicked.connect(lambda: self.add_bookmark_folder(bookmarks_tree))
+
+            move_button = QPushButton("Переместить")
+            move_button.clicked.connect(lambda: self.move_bookmark_item(bookmarks_tree))
+
+            tags_button = QPushButton("Теги")
+            tags_button.clicked.connect(lambda: self.edit_bookmark_tags(bookmarks_tree))
+
+            delete_button = QPushButton("Удалить")
+            delete_button.clicked.connect(lambda: self.delete_bookmark_item(bookmarks_tree))
+
+            buttons_layout = QHBoxLayout()
+            buttons_layout.addWidget(import_button)
+            buttons_layout.addWidget(new_folder_button)
+            buttons_layout.addWidget(move_button)
+            buttons_layout.addWidget(tags_button)
+            buttons_layout.addWidget(delete_button)
+
+            layout.addWidget(bookmarks_tree)
+            layout.addLayout(buttons_layout)
+
+            bookmarks_widget.setLayout(layout)
+            i = self.tabs.addTab(bookmarks_widget, "Закладки")
+            self.tabs.setCurrentIndex(i)
+        except Exception as e:
+            self.error_logger.error(f'Error showing bookmarks: {e}')
+
+    def populate_bookmarks(self, bookmarks_tree, folder_id=ROOT_FOLDER, parent_item=None):
+        if parent_item is None:
+            bookmarks_tree.clear()
+            parent_item = QTreeWidgetItem(bookmarks_tree, [self.bookmarks.folders[ROOT_FOLDER]['title']])
+            parent_item.setData(0, Qt.UserRole, ('folder', ROOT_FOLDER))
+            parent_item.setExpanded(True)
+        for folder in sorted(self.bookmarks.subfolders(folder_id), key=lambda f: f['title'].lower()):
+            folder_item = QTreeWidgetItem(parent_item, [folder['title']])
+            folder_item.setData(0, Qt.UserRole, ('folder', folder['id']))
+            self.populate_bookmarks(bookmarks_tree, folder['id'], folder_item)
+        for bookmark in self.bookmarks.bookmarks_in(folder_id):
+            bookmark_item = QTreeWidgetItem(parent_item, [bookmark['title'], bookmark['url'], ', '.join(bookmark['tags'])])
+            bookmark_item.setData(0, Qt.UserRole, ('bookmark', bookmark['url']))
+
+    def selected_bookmark_folder(self, bookmarks_tree):
+        item = bookmarks_tree.currentItem()
+        if item is None:
+            return ROOT_FOLDER
+        kind, key = item.data(0, Qt.UserRole)
+        if kind == 'folder':
+            return key
+        return self.bookmarks.get(key)['folder']
+
+    def open_bookmark_item(self, item, column=0):
+        try:
+            kind, key = item.data(0, Qt.UserRole)
+            if kind == 'bookmark':
+                self.add_new_tab(QUrl(key))
+        except Exception as e:
+            self.error_logger.error(f'Error opening bookmark: {e}')
+
+    def import_bookmarks(self, bookmarks_tree):
+        try:
+            path, _ = QFileDialog.getOpenFileName(self, "Импорт закладок", os.path.expanduser('~'), "HTML (*.html *.htm)")
+            if path:
+                count = self.bookmarks.import_netscape(path)
+                self.populate_bookmarks(bookmarks_tree)
+                self.update_bookmark_button()
+                logging.info(f'Bookmarks imported: {count} from {path}')
+                QMessageBox.information(self, 'Импорт', f'Импортировано закладок: {count}')
+        except Exception as e:
+            self.error_logger.error(f'Error importing bookmarks: {e}')
+            QMessageBox.critical(self, 'Ошибка', 'Не удалось импортировать закладки.')
+
+    def add_bookmark_folder(self, bookmarks_tree):
+        try:
+            title, ok = QInputDialog.getText(self, "Новая папка", "Название папки:")
+            if ok and title.strip():
+                self.bookmarks.add_folder(title.strip(), self.selected_bookmark_folder(bookmarks_tree))
+                self.populate_bookmarks(bookmarks_tree)
+                logging.info(f'Bookmark folder added: {title}')
+        except Exception as e:
+            self.error_logger.error(f'Error adding bookmark folder: {e}')
+
+    def move_bookmark_item(self, bookmarks_tree):
+        try:
+            item = bookmarks_tree.currentItem()
+            if item is None:
+                return
+            kind, key = item.data(0, Qt.UserRole)
+            if kind != 'bookmark':
+                return
+            folder_ids = list(self.bookmarks.folders)
+            folder_paths = [self.bookmarks.folder_path(folder_id) for folder_id in folder_ids]
+            path, ok = QInputDialog.getItem(self, "Переместить", "Папка:", folder_paths, 0, False)
+            if ok:
+                self.bookmarks.update(key, folder=folder_ids[folder_paths.index(path)])
+                self.populate_bookmarks(bookmarks_tree)
+                logging.info(f'Bookmark moved: {key}')
+        except Exception as e:
+            self.error_logger.error(f'Error moving bookmark: {e}')
+
+    def edit_bookmark_tags(self, bookmarks_tree):
+        try:
+            item = bookmarks_tree.currentItem()
+            if item is None:
+                return
+            kind, key = item.data(0, Qt.UserRole)
+            if kind != 'bookmark':
+                return
+            text, ok = QInputDialog.getText(self, "Теги", "Теги через запятую:", text=', '.join(self.bookmarks.get(key)['tags']))
+            if ok:
+                tags = [tag.strip() for tag in text.split(',') if tag.strip()]
+                self.bookmarks.update(key, tags=tags)
+                self.populate_bookmarks(bookmarks_tree)
+                logging.info(f'Bookmark tags updated: {key}')
+        except Exception as e:
+            self.error_logger.error(f'Error editing bookmark tags: {e}')
+
+    def delete_bookmark_item(self, bookmarks_tree):
+        try:
+            item = bookmarks_tree.currentItem()
+            if item is None:
+                return
+            kind, key = item.data(0, Qt.UserRole)
+            if kind == 'folder' and key == ROOT_FOLDER:
+                return
+            reply = QMessageBox.question(self, 'Удалить закладку', f'Вы уверены, что хотите удалить {item.text(0)}?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                if kind == 'folder':
+                    self.bookmarks.remove_folder(key)
+                else:
+                    self.bookmarks.remove(key)
+                self.populate_bookmarks(bookmarks_tree)
+                self.update_bookmark_button()
+                logging.info(f'Bookmark deleted: {key}')
+        except Exception as e:
+            self.error_logger.error(f'Error deleting bookmark: {e}')
+
+    def compact_bookmarks(self):
+        try:
+            if self.bookmarks.journal_size:
+                self.bookmarks.compact()
+                logging.info('Bookmarks compacted')
+        except Exception as e:
+            self.error_logger.error(f'Error compacting bookmarks: {e}')
+
     def closeEvent(self, event):
+        self.compact_bookmarks()
+        self.flush_settings()
         reply = QMessageBox.question(self, 'Сохранить вкладки', 'Вы хотите сохранить открытые вкладки для следующего сеанса?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.save_tabs()
@@ -684,7 +1354,7 @@ class Browser(QMainWindow):
                         self.add_new_tab(QUrl(tab))
                 logging.info('Tabs restored')
             else:
-                self.add_new_tab(QUrl(self.default_search_engine))
+                self.add_new_tab(QUrl(self.settings['default_search_engine']))
         except Exception as e:
             self.error_logger.error(f'Error restoring tabs: {e}')
 